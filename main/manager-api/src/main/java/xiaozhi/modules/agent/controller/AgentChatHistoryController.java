@@ -1,15 +1,23 @@
 package xiaozhi.modules.agent.controller;
 
+import java.io.IOException;
+import java.util.List;
+
+import org.springframework.http.MediaType;
+import org.springframework.web.bind.annotation.ModelAttribute;
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
 import org.springframework.web.bind.annotation.RequestMapping;
+import org.springframework.web.bind.annotation.RequestParam;
 import org.springframework.web.bind.annotation.RestController;
+import org.springframework.web.multipart.MultipartFile;
 
 import io.swagger.v3.oas.annotations.Operation;
 import io.swagger.v3.oas.annotations.tags.Tag;
 import jakarta.validation.Valid;
 import lombok.RequiredArgsConstructor;
 import xiaozhi.common.utils.Result;
+import xiaozhi.common.validator.ValidatorUtils;
 import xiaozhi.modules.agent.dto.AgentChatHistoryReportDTO;
 import xiaozhi.modules.agent.service.biz.AgentChatHistoryBizService;
 
@@ -33,4 +41,37 @@ public class AgentChatHistoryController {
         Boolean result = agentChatHistoryBizService.report(request);
         return new Result<Boolean>().ok(result);
     }
+
+    /**
+     * 小智服务聊天批量上报请求
+     * <p>
+     * 同一设备短时间内产生的多条聊天记录合并为一次请求上报，减少网络往返。
+     *
+     * @param requests 聊天上报请求列表
+     */
+    @Operation(summary = "小智服务聊天批量上报请求")
+    @PostMapping("/report/batch")
+    public Result<Boolean> uploadBatch(@RequestBody List<AgentChatHistoryReportDTO> requests) {
+        requests.forEach(ValidatorUtils::validateEntity);
+        Boolean result = agentChatHistoryBizService.reportBatch(requests);
+        return new Result<Boolean>().ok(result);
+    }
+
+    /**
+     * 小智服务聊天上报请求（二进制音频）
+     * <p>
+     * 音频以multipart文件直接上传，避免base64编码带来的体积膨胀和编解码开销。
+     *
+     * @param request 聊天上报请求对象，audioBase64字段忽略
+     * @param audio   音频文件
+     */
+    @Operation(summary = "小智服务聊天上报请求（二进制音频）")
+    @PostMapping(value = "/report/audio", consumes = MediaType.MULTIPART_FORM_DATA_VALUE)
+    public Result<Boolean> uploadAudio(@ModelAttribute AgentChatHistoryReportDTO request,
+            @RequestParam(value = "audio", required = false) MultipartFile audio) throws IOException {
+        ValidatorUtils.validateEntity(request);
+        byte[] audioData = audio != null && !audio.isEmpty() ? audio.getBytes() : null;
+        Boolean result = agentChatHistoryBizService.report(request, audioData);
+        return new Result<Boolean>().ok(result);
+    }
 }
@@ -1,5 +1,7 @@
 package xiaozhi.modules.agent.service.biz;
 
+import java.util.List;
+
 import xiaozhi.modules.agent.dto.AgentChatHistoryReportDTO;
 
 /**
@@ -19,4 +21,21 @@ public interface AgentChatHistoryBizService {
      * @return 上传结果，true表示成功，false表示失败
      */
     Boolean report(AgentChatHistoryReportDTO agentChatHistoryReportDTO);
+
+    /**
+     * 聊天上报方法，音频以二进制形式传入
+     *
+     * @param agentChatHistoryReportDTO 包含聊天上报所需信息的输入对象
+     * @param audioData                 音频数据，为空时使用输入对象中的base64音频
+     * @return 上传结果，true表示成功，false表示失败
+     */
+    Boolean report(AgentChatHistoryReportDTO agentChatHistoryReportDTO, byte[] audioData);
+
+    /**
+     * 聊天批量上报方法
+     *
+     * @param reports 聊天上报输入对象列表
+     * @return 上传结果，全部成功返回true，否则返回false
+     */
+    Boolean reportBatch(List<AgentChatHistoryReportDTO> reports);
 }
@@ -2,6 +2,7 @@ package xiaozhi.modules.agent.service.biz.impl;
 
 import java.util.Base64;
 import java.util.Date;
+import java.util.List;
 import java.util.Objects;
 
 import org.springframework.stereotype.Service;
@@ -48,6 +49,19 @@ public class AgentChatHistoryBizServiceImpl implements AgentChatHistoryBizServic
     @Override
     @Transactional(rollbackFor = Exception.class)
     public Boolean report(AgentChatHistoryReportDTO report) {
+        return report(report, null);
+    }
+
+    /**
+     * 处理聊天记录上报，音频以二进制形式传入
+     *
+     * @param report    包含聊天上报所需信息的输入对象
+     * @param audioData 音频数据，为空时使用输入对象中的base64音频
+     * @return 上传结果，true表示成功，false表示失败
+     */
+    @Override
+    @Transactional(rollbackFor = Exception.class)
+    public Boolean report(AgentChatHistoryReportDTO report, byte[] audioData) {
         String macAddress = report.getMacAddress();
         Byte chatType = report.getChatType();
         Long reportTimeMillis = null != report.getReportTime() ? report.getReportTime() * 1000 : System.currentTimeMillis();
@@ -65,7 +79,7 @@ public class AgentChatHistoryBizServiceImpl implements AgentChatHistoryBizServic
         if (Objects.equals(chatHistoryConf, Constant.ChatHistoryConfEnum.RECORD_TEXT.getCode())) {
             saveChatText(report, agentId, macAddress, null, reportTimeMillis);
         } else if (Objects.equals(chatHistoryConf, Constant.ChatHistoryConfEnum.RECORD_TEXT_AUDIO.getCode())) {
-            String audioId = saveChatAudio(report);
+            String audioId = saveChatAudio(report, audioData);
             saveChatText(report, agentId, macAddress, audioId, reportTimeMillis);
         }
 
@@ -84,14 +98,37 @@ public class AgentChatHistoryBizServiceImpl implements AgentChatHistoryBizServic
     }
 
     /**
-     * base64解码report.getOpusDataBase64(),存入ai_agent_chat_audio表
+     * 批量处理聊天记录上报，逐条复用单条上报逻辑
+     *
+     * @param reports 聊天上报输入对象列表
+     * @return 上传结果，全部成功返回true，否则返回false
      */
-    private String saveChatAudio(AgentChatHistoryReportDTO report) {
+    @Override
+    @Transactional(rollbackFor = Exception.class)
+    public Boolean reportBatch(List<AgentChatHistoryReportDTO> reports) {
+        boolean success = true;
+        for (AgentChatHistoryReportDTO report : reports) {
+            success &= Boolean.TRUE.equals(report(report));
+        }
+        return success;
+    }
+
+    /**
+     * 保存音频数据，未传入二进制音频时base64解码report.getAudioBase64(),存入ai_agent_chat_audio表
+     */
+    private String saveChatAudio(AgentChatHistoryReportDTO report, byte[] audioData) {
         String audioId = null;
 
-        if (report.getAudioBase64() != null && !report.getAudioBase64().isEmpty()) {
+        if (audioData == null && report.getAudioBase64() != null && !report.getAudioBase64().isEmpty()) {
+            try {
+                audioData = Base64.getDecoder().decode(report.getAudioBase64());
+            } catch (Exception e) {
+                log.error("音频数据解码失败", e);
+                return null;
+            }
+        }
+        if (audioData != null && audioData.length > 0) {
             try {
-                byte[] audioData = Base64.getDecoder().decode(report.getAudioBase64());
                 audioId = agentChatAudioService.saveAudio(audioData);
                 log.info("音频数据保存成功，audioId={}", audioId);
             } catch (Exception e) {
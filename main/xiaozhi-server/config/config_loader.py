@@ -55,7 +55,9 @@ def get_config_from_api(config):
         raise Exception("Failed to fetch server config from API")
 
     config_data["read_config_from_api"] = True
+    # manager-api的配置以本地为准，保留本地的上报等可选参数
     config_data["manager-api"] = {
+        **config["manager-api"],
         "url": config["manager-api"].get("url", ""),
         "secret": config["manager-api"].get("secret", ""),
     }
@@ -1,12 +1,23 @@
 import os
 import time
 import base64
-from typing import Optional, Dict
+import threading
+from typing import Optional, Dict, List
 
 import httpx
+import orjson
+from loguru import logger
 
 TAG = __name__
 
+# 聊天记录上报接口
+CHAT_REPORT_ENDPOINT = "/agent/chat-history/report"
+CHAT_REPORT_BATCH_ENDPOINT = "/agent/chat-history/report/batch"
+CHAT_REPORT_AUDIO_ENDPOINT = "/agent/chat-history/report/audio"
+
+# JSON请求体的请求头，预先构建避免每次请求重复创建
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 
 class DeviceNotFoundException(Exception):
     pass
@@ -22,12 +33,24 @@ class ManageApiClient:
     _instance = None
     _client = None
     _secret = None
+    _lock = threading.Lock()
+    # 上报熔断状态
+    _report_failures = 0
+    _report_open_until = 0.0
+    _report_breaker_lock = threading.Lock()
 
     def __new__(cls, config):
         """单例模式确保全局唯一实例，并支持传入配置参数"""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._init_client(config)
+        # 已初始化时直接返回，无需加锁
+        if cls._instance is not None:
+            return cls._instance
+        with cls._lock:
+            # 双重检查，避免并发初始化创建多个连接池
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                cls._init_client(config)
+                # 连接池初始化完成后再发布实例，避免其他线程拿到未初始化的客户端
+                cls._instance = instance
         return cls._instance
 
     @classmethod
@@ -47,6 +70,12 @@ class ManageApiClient:
         cls._secret = cls.config.get("secret")
         cls.max_retries = cls.config.get("max_retries", 6)  # 最大重试次数
         cls.retry_delay = cls.config.get("retry_delay", 10)  # 初始重试延迟(秒)
+        # 上报连续失败达到阈值后熔断，熔断期内直接丢弃上报
+        cls.report_failure_threshold = cls.config.get("report_failure_threshold", 5)
+        cls.report_open_seconds = cls.config.get("report_open_seconds", 30)
+        # 上报默认不重试并使用较短超时，失败很快计入熔断，不长时间占用上报协程
+        cls.report_max_retries = cls.config.get("report_max_retries", 0)
+        cls.report_timeout = cls.config.get("report_timeout", 10)
         # NOTE(goody): 2025/4/16 http相关资源统一管理，后续可以增加线程池或者超时
         # 后续也可以统一配置apiToken之类的走通用的Auth
         cls._client = httpx.Client(
@@ -57,12 +86,23 @@ class ManageApiClient:
                 "Authorization": "Bearer " + cls._secret,
             },
             timeout=cls.config.get("timeout", 30),  # 默认超时时间30秒
+            # 上报等高频请求复用长连接，避免每次都重新进行TCP/TLS握手
+            # 连接数沿用httpx默认值(100/20)，仅延长空闲连接的保活时间
+            limits=httpx.Limits(
+                max_connections=cls.config.get("max_connections", 100),
+                max_keepalive_connections=cls.config.get("max_keepalive", 20),
+                keepalive_expiry=cls.config.get("keepalive_expiry", 60),
+            ),
         )
 
     @classmethod
     def _request(cls, method: str, endpoint: str, **kwargs) -> Dict:
         """发送单次HTTP请求并处理响应"""
         endpoint = endpoint.lstrip("/")
+        if "json" in kwargs:
+            # 使用orjson预先序列化，上报音频base64等大请求体时明显快于标准库json
+            kwargs["content"] = orjson.dumps(kwargs.pop("json"))
+            kwargs["headers"] = JSON_HEADERS
         response = cls._client.request(method, endpoint, **kwargs)
         response.raise_for_status()
 
@@ -108,7 +148,7 @@ class ManageApiClient:
                 # 判断是否应该重试
                 if retry_count < cls.max_retries and cls._should_retry(e):
                     retry_count += 1
-                    print(
+                    logger.bind(tag=TAG).warning(
                         f"{method} {endpoint} 请求失败，将在 {cls.retry_delay:.1f} 秒后进行第 {retry_count} 次重试"
                     )
                     time.sleep(cls.retry_delay)
@@ -117,6 +157,54 @@ class ManageApiClient:
                     # 不重试，直接抛出异常
                     raise
 
+    @classmethod
+    def _execute_report_request(cls, endpoint: str, **kwargs) -> Optional[Dict]:
+        """带熔断的上报请求执行器
+
+        manager-api不可用时，上报会在超时和重试上长时间阻塞，导致上报队列积压。
+        上报默认不重试，每次请求失败都计入熔断计数，连续失败达到阈值后进入熔断期，
+        期间直接丢弃上报，熔断结束后再恢复请求。
+        """
+        retry_count = 0
+
+        while True:
+            # 重试前同样检查熔断状态，其他上报已触发熔断时不再继续请求
+            if time.monotonic() < cls._report_open_until:
+                return None
+            try:
+                result = cls._request(
+                    "POST", endpoint, timeout=cls.report_timeout, **kwargs
+                )
+            except Exception as e:
+                # 只有网络和服务端错误计入失败，业务错误不触发熔断
+                if not cls._should_retry(e):
+                    raise
+                # 每次请求失败都计入熔断计数
+                cls._record_report_failure()
+                if retry_count >= cls.report_max_retries:
+                    raise
+                retry_count += 1
+                logger.bind(tag=TAG).warning(
+                    f"POST {endpoint} 上报失败，将在 {cls.retry_delay:.1f} 秒后进行第 {retry_count} 次重试"
+                )
+                time.sleep(cls.retry_delay)
+                continue
+            with cls._report_breaker_lock:
+                cls._report_failures = 0
+            return result
+
+    @classmethod
+    def _record_report_failure(cls):
+        """记录一次上报失败，连续失败达到阈值后进入熔断期"""
+        with cls._report_breaker_lock:
+            cls._report_failures += 1
+            if cls._report_failures >= cls.report_failure_threshold:
+                cls._report_failures = 0
+                cls._report_open_until = time.monotonic() + cls.report_open_seconds
+                logger.bind(tag=TAG).warning(
+                    f"聊天记录上报连续失败，暂停上报 {cls.report_open_seconds} 秒"
+                )
+
     @classmethod
     def safe_close(cls):
         """安全关闭连接池"""
@@ -155,33 +243,75 @@ def save_mem_local_short(mac_address: str, short_momery: str) -> Optional[Dict]:
             },
         )
     except Exception as e:
-        print(f"存储短期记忆到服务器失败: {e}")
+        logger.bind(tag=TAG).error(f"存储短期记忆到服务器失败: {e}")
         return None
 
 
+def _build_report_body(
+    mac_address: str, session_id: str, chat_type: int, content: str, audio, report_time
+) -> Dict:
+    """构建聊天记录上报请求体"""
+    return {
+        "macAddress": mac_address,
+        "sessionId": session_id,
+        "chatType": chat_type,
+        "content": content,
+        "reportTime": report_time,
+        "audioBase64": (base64.b64encode(audio).decode("utf-8") if audio else None),
+    }
+
+
 def report(
     mac_address: str, session_id: str, chat_type: int, content: str, audio, report_time
 ) -> Optional[Dict]:
-    """带熔断的业务方法示例"""
+    """上报单条聊天记录，manager-api不可用时熔断"""
     if not content or not ManageApiClient._instance:
         return None
     try:
-        return ManageApiClient._instance._execute_request(
-            "POST",
-            f"/agent/chat-history/report",
-            json={
-                "macAddress": mac_address,
-                "sessionId": session_id,
-                "chatType": chat_type,
-                "content": content,
-                "reportTime": report_time,
-                "audioBase64": (
-                    base64.b64encode(audio).decode("utf-8") if audio else None
-                ),
-            },
+        if audio and ManageApiClient.config.get("report_audio_raw", False):
+            # 音频以二进制文件上传，省去base64编码带来的约1/3体积膨胀
+            return ManageApiClient._instance._execute_report_request(
+                CHAT_REPORT_AUDIO_ENDPOINT,
+                data={
+                    "macAddress": mac_address,
+                    "sessionId": session_id,
+                    "chatType": chat_type,
+                    "content": content,
+                    "reportTime": report_time,
+                },
+                files={"audio": ("audio.wav", audio, "audio/wav")},
+            )
+        return ManageApiClient._instance._execute_report_request(
+            CHAT_REPORT_ENDPOINT,
+            json=_build_report_body(
+                mac_address, session_id, chat_type, content, audio, report_time
+            ),
+        )
+    except Exception as e:
+        logger.bind(tag=TAG).error(f"TTS上报失败: {e}")
+        return None
+
+
+def report_batch(
+    mac_address: str, session_id: str, reports: List[Dict]
+) -> Optional[Dict]:
+    """批量上报聊天记录，多条记录合并为一次请求
+
+    Args:
+        reports: 上报记录列表，每条包含chat_type、content、audio、report_time
+    """
+    reports = [item for item in reports if item["content"]]
+    if not reports or not ManageApiClient._instance:
+        return None
+    try:
+        return ManageApiClient._instance._execute_report_request(
+            CHAT_REPORT_BATCH_ENDPOINT,
+            json=[
+                _build_report_body(mac_address, session_id, **item) for item in reports
+            ],
         )
     except Exception as e:
-        print(f"TTS上报失败: {e}")
+        logger.bind(tag=TAG).error(f"批量上报失败: {e}")
         return None
 
 
@@ -10,6 +10,7 @@ import threading
 import traceback
 import subprocess
 import websockets
+from urllib.parse import parse_qs, urlparse
 from core.utils.util import (
     extract_json_from_string,
     check_vad_update,
@@ -23,7 +24,7 @@ from core.utils.modules_initialize import (
     initialize_tts,
     initialize_asr,
 )
-from core.handle.reportHandle import report
+from core.handle.reportHandle import merge_report, report, report_batch
 from core.providers.tts.default import DefaultTTS
 from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
@@ -43,6 +44,9 @@ from core.utils import textUtils
 
 TAG = __name__
 
+# 清空队列时需要同时兼容线程队列（TTS）和协程队列（上报）的空队列异常
+QUEUE_EMPTY_ERRORS = (queue.Empty, asyncio.QueueEmpty)
+
 auto_import_modules("plugins_func.functions")
 
 
@@ -92,9 +96,35 @@ class ConnectionHandler:
         self.stop_event = threading.Event()
         self.executor = ThreadPoolExecutor(max_workers=5)
 
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 上报队列，由事件循环上的上报协程消费
+        # 队列有上限，上报服务异常时丢弃最旧的数据，避免音频数据堆积占满内存
+        report_config = self.config.get("manager-api", {})
+        # 多个上报协程并行消费，避免单条上报超时阻塞后续记录
+        # 上报在连接线程池中执行，数量不宜过多，以免占满线程池影响对话
+        self.report_workers = report_config.get("report_workers", 2)
+        # 队列至少能容纳每个上报协程的毒丸对象，关闭时毒丸对象不会互相挤掉
+        self.report_queue = asyncio.Queue(
+            maxsize=max(
+                report_config.get("report_queue_size", 100), self.report_workers
+            )
+        )
+        self.report_tasks = []
+        # 同一时刻只有一个上报协程从队列收集数据，其余协程只并行执行上报
+        self.report_collect_lock = asyncio.Lock()
+        self.report_dropped = 0
+        self.report_dropped_logged_at = 0.0
+        # 单条上报音频超过该大小时只上报文本
+        self.report_audio_max_bytes = report_config.get(
+            "report_audio_max_bytes", 512 * 1024
+        )
+        # 开启批量上报后，短时间窗口内的多条记录合并为一次请求
+        self.report_batch_enable = report_config.get("report_batch", False)
+        self.report_batch_size = report_config.get("report_batch_size", 32)
+        self.report_batch_window = report_config.get("report_batch_window", 0.05)
+        # 智能体回复按句上报，开启后同一轮回复在空闲窗口内合并为一条记录，0为不合并
+        self.report_merge_window = report_config.get("report_merge_window", 0)
+        self.pending_tts_report = None
+        self.pending_tts_report_handle = None
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -168,8 +198,6 @@ class ConnectionHandler:
 
             if self.headers.get("device-id", None) is None:
                 # 尝试从 URL 的查询参数中获取 device-id
-                from urllib.parse import parse_qs, urlparse
-
                 # 从 WebSocket 请求中获取路径
                 request_path = ws.request.path
                 if not request_path:
@@ -376,8 +404,8 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
+            """初始化上报协程"""
+            self._init_report_task()
             """更新系统提示词"""
             self._init_prompt_enhancement()
 
@@ -394,18 +422,87 @@ class ConnectionHandler:
             self.change_system_prompt(enhanced_prompt)
             self.logger.bind(tag=TAG).info("系统提示词已增强更新")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
+    def _init_report_task(self):
+        """初始化ASR和TTS上报协程"""
         if not self.read_config_from_api or self.need_bind:
             return
         if self.chat_history_conf == 0:
             return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
+        # 组件在线程池中初始化，协程统一在事件循环中启动，与close()发送毒丸对象互斥
+        self.loop.call_soon_threadsafe(self._start_report_workers)
+
+    def _start_report_workers(self):
+        """在事件循环中启动上报协程"""
+        if self.stop_event.is_set():
+            # 连接已关闭，不再启动上报协程，避免协程收不到毒丸对象永远挂起
+            return
+        self.report_tasks = [task for task in self.report_tasks if not task.done()]
+        if self.report_tasks:
+            return
+        for _ in range(self.report_workers):
+            self.report_tasks.append(self.loop.create_task(self._report_worker()))
+        self.logger.bind(tag=TAG).info(f"TTS上报协程已启动: {self.report_workers}个")
+
+    def enqueue_report(self, item):
+        """线程安全地将上报数据放入上报队列"""
+        self.loop.call_soon_threadsafe(self._put_report, item)
+
+    def _put_report(self, item):
+        """在事件循环中放入上报数据，按需合并智能体的连续回复"""
+        if self.stop_event.is_set():
+            # 连接关闭后不再接收上报，避免挤掉已放入的毒丸对象
+            return
+        if self.report_merge_window <= 0:
+            self._put_report_nowait(item)
+            return
+        if item.type != 2:
+            # 用户发言前先上报已合并的智能体回复，保持上报顺序
+            self._flush_tts_report()
+            self._put_report_nowait(item)
+            return
+
+        pending = self.pending_tts_report
+        if pending is None:
+            self.pending_tts_report = item
+        else:
+            merge_report(self, pending, item)
+        # 每收到一句重新计时，回复空闲超过窗口后再上报
+        if self.pending_tts_report_handle is not None:
+            self.pending_tts_report_handle.cancel()
+        self.pending_tts_report_handle = self.loop.call_later(
+            self.report_merge_window, self._flush_tts_report
+        )
+
+    def _flush_tts_report(self):
+        """上报已合并的智能体回复"""
+        if self.pending_tts_report_handle is not None:
+            self.pending_tts_report_handle.cancel()
+            self.pending_tts_report_handle = None
+        item, self.pending_tts_report = self.pending_tts_report, None
+        if item is not None:
+            self._put_report_nowait(item)
+
+    def _put_report_nowait(self, item):
+        """放入上报队列，队列已满时丢弃最旧的一条"""
+        try:
+            self.report_queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+        try:
+            self.report_queue.get_nowait()
+            self.report_queue.task_done()
+        except asyncio.QueueEmpty:
+            pass
+        self.report_queue.put_nowait(item)
+        self.report_dropped += 1
+        # 限制日志频率，上报服务故障期间不刷屏
+        now = time.time()
+        if now - self.report_dropped_logged_at > 10:
+            self.report_dropped_logged_at = now
+            self.logger.bind(tag=TAG).warning(
+                f"上报队列已满，累计丢弃 {self.report_dropped} 条聊天记录"
             )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
 
     def _initialize_tts(self):
         """初始化TTS"""
@@ -886,39 +983,71 @@ class ConnectionHandler:
         else:
             pass
 
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
+    async def _report_worker(self):
+        """聊天记录上报工作协程"""
+        while True:
+            # 收集期间持有锁，批量窗口内的连续记录不会被多个协程拆成多次请求
+            async with self.report_collect_lock:
+                # 阻塞等待上报数据，只通过毒丸对象退出
+                item = await self.report_queue.get()
                 if item is None:  # 检测毒丸对象
                     break
-                try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
+                items = [item]
+                received_pill = False
+                if self.report_batch_enable:
+                    received_pill = await self._collect_report_batch(items)
+            try:
+                # 检查线程池状态，线程池关闭后丢弃剩余数据，等待毒丸对象退出
+                if self.executor is not None:
+                    # opus解码和HTTP上报都是阻塞操作，放到线程池中执行
+                    await self.loop.run_in_executor(
+                        self.executor, self._process_reports, items
+                    )
             except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
+                self.logger.bind(tag=TAG).error(f"聊天记录上报协程异常: {e}")
+            finally:
+                # 标记任务完成
+                for _ in items:
+                    self.report_queue.task_done()
+            if received_pill:
+                break
 
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
+        self.logger.bind(tag=TAG).info("聊天记录上报协程已退出")
 
-    def _process_report(self, type, text, audio_data, report_time):
+    async def _collect_report_batch(self, items):
+        """在批量窗口内继续收集上报数据，返回是否收到毒丸对象"""
+        deadline = self.loop.time() + self.report_batch_window
+        while len(items) < self.report_batch_size:
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.report_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                self.report_queue.task_done()
+                return True
+            items.append(item)
+        return False
+
+    def _process_reports(self, items):
+        """处理上报任务，多条时合并为一次批量上报"""
+        if len(items) > 1:
+            try:
+                report_batch(self, items)
+            except Exception as e:
+                self.logger.bind(tag=TAG).error(f"批量上报处理异常: {e}")
+            return
+        self._process_report(items[0])
+
+    def _process_report(self, item):
         """处理上报任务"""
         try:
             # 执行上报（传入二进制数据）
-            report(self, type, text, audio_data, report_time)
+            report(self, item.type, item.text, item.opus_data, item.report_time)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
 
     def clearSpeakStatus(self):
         self.client_is_speaking = False
@@ -951,6 +1080,14 @@ class ConnectionHandler:
 
             # 清空任务队列
             self.clear_queues()
+            # 先上报尚未上报的合并回复，再放入毒丸对象，保证上报协程退出前处理完
+            self._flush_tts_report()
+            # 每个上报协程放入一个毒丸对象，唤醒并结束上报协程
+            for _ in self.report_tasks:
+                if self.report_queue.full():
+                    self.report_queue.get_nowait()
+                    self.report_queue.task_done()
+                self.report_queue.put_nowait(None)
 
             # 关闭WebSocket连接
             try:
@@ -1027,7 +1164,7 @@ class ConnectionHandler:
                 while True:
                     try:
                         q.get_nowait()
-                    except queue.Empty:
+                    except QUEUE_EMPTY_ERRORS:
                         break
 
             self.logger.bind(tag=TAG).debug(
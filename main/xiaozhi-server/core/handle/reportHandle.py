@@ -2,22 +2,35 @@
 TTS上报功能已集成到ConnectionHandler类中。
 
 上报功能包括：
-1. 每个连接对象拥有自己的上报队列和处理线程
-2. 上报线程的生命周期与连接对象绑定
-3. 使用ConnectionHandler.enqueue_tts_report方法进行上报
+1. 每个连接对象拥有自己的上报队列和上报协程
+2. 上报协程的生命周期与连接对象绑定
+3. 使用ConnectionHandler.enqueue_report方法将数据放入上报队列
 
 具体实现请参考core/connection.py中的相关代码。
 """
 
 import time
+from dataclasses import dataclass
+from typing import List, Optional
 
 import opuslib_next
 
 from config.manage_api_client import report as manage_report
+from config.manage_api_client import report_batch as manage_report_batch
 
 TAG = __name__
 
 
+@dataclass(slots=True)
+class ChatReport:
+    """上报队列中的一条聊天记录"""
+
+    type: int  # 上报类型，1为用户，2为智能体
+    text: str
+    opus_data: Optional[List[bytes]]  # 不上报音频时为None
+    report_time: int
+
+
 def report(conn, type, text, opus_data, report_time):
     """执行聊天记录上报操作
 
@@ -46,6 +59,38 @@ def report(conn, type, text, opus_data, report_time):
         conn.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
 
 
+def report_batch(conn, items):
+    """批量执行聊天记录上报操作，多条记录合并为一次请求
+
+    Args:
+        conn: 连接对象
+        items: ChatReport上报数据列表
+    """
+    reports = []
+    for item in items:
+        try:
+            audio_data = opus_to_wav(conn, item.opus_data) if item.opus_data else None
+        except Exception as e:
+            conn.logger.bind(tag=TAG).error(f"聊天记录音频转换失败: {e}")
+            continue
+        reports.append(
+            {
+                "chat_type": item.type,
+                "content": item.text,
+                "audio": audio_data,
+                "report_time": item.report_time,
+            }
+        )
+    try:
+        manage_report_batch(
+            mac_address=conn.device_id,
+            session_id=conn.session_id,
+            reports=reports,
+        )
+    except Exception as e:
+        conn.logger.bind(tag=TAG).error(f"聊天记录批量上报失败: {e}")
+
+
 def opus_to_wav(conn, opus_data):
     """将Opus数据转换为WAV格式的字节流
 
@@ -93,11 +138,47 @@ def opus_to_wav(conn, opus_data):
     return bytes(wav_header) + pcm_data_bytes
 
 
+def _audio_within_limit(conn, opus_data):
+    """音频超过上报大小限制时只上报文本"""
+    audio_size = sum(len(packet) for packet in opus_data)
+    if audio_size > conn.report_audio_max_bytes:
+        conn.logger.bind(tag=TAG).warning(
+            f"上报音频过大({audio_size}字节)，仅上报文本: {conn.device_id}"
+        )
+        return False
+    return True
+
+
+def merge_report(conn, pending, item):
+    """将智能体的一句回复合并到待上报的记录中
+
+    Args:
+        conn: 连接对象
+        pending: 待上报的ChatReport
+        item: 新的一句回复
+    """
+    if item.text:
+        text = pending.text or ""
+        # 英文等ASCII文本按句拼接时补一个空格，中文直接拼接
+        if (
+            text
+            and text[-1].isascii()
+            and item.text[0].isascii()
+            and not text[-1].isspace()
+            and not item.text[0].isspace()
+        ):
+            text += " "
+        pending.text = text + item.text
+    if pending.opus_data is not None and item.opus_data is not None:
+        pending.opus_data = pending.opus_data + item.opus_data
+        # 合并后的音频同样受上报大小限制
+        if not _audio_within_limit(conn, pending.opus_data):
+            pending.opus_data = None
+    else:
+        pending.opus_data = None
+
+
 def enqueue_tts_report(conn, text, opus_data):
-    if not conn.read_config_from_api or conn.need_bind or not conn.report_tts_enable:
-        return
-    if conn.chat_history_conf == 0:
-        return
     """将TTS数据加入上报队列
 
     Args:
@@ -105,45 +186,44 @@ def enqueue_tts_report(conn, text, opus_data):
         text: 合成文本
         opus_data: opus音频数据
     """
-    try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
-        if conn.chat_history_conf == 2:
-            conn.report_queue.put((2, text, opus_data, int(time.time())))
-            conn.logger.bind(tag=TAG).debug(
-                f"TTS数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
-            )
-        else:
-            conn.report_queue.put((2, text, None, int(time.time())))
-            conn.logger.bind(tag=TAG).debug(
-                f"TTS数据已加入上报队列: {conn.device_id}, 不上报音频"
-            )
-    except Exception as e:
-        conn.logger.bind(tag=TAG).error(f"加入TTS上报队列失败: {text}, {e}")
+    if not conn.read_config_from_api or conn.need_bind or not conn.report_tts_enable:
+        return
+    _enqueue_report(conn, 2, text, opus_data)
 
 
 def enqueue_asr_report(conn, text, opus_data):
-    if not conn.read_config_from_api or conn.need_bind or not conn.report_asr_enable:
-        return
-    if conn.chat_history_conf == 0:
-        return
     """将ASR数据加入上报队列
 
     Args:
         conn: 连接对象
-        text: 合成文本
+        text: 识别文本
         opus_data: opus音频数据
     """
+    if not conn.read_config_from_api or conn.need_bind or not conn.report_asr_enable:
+        return
+    _enqueue_report(conn, 1, text, opus_data)
+
+
+# 上报类型对应的日志名称，1为用户，2为智能体
+_REPORT_TYPE_NAMES = {1: "ASR", 2: "TTS"}
+
+
+def _enqueue_report(conn, type, text, opus_data):
+    """按上报类型将数据加入连接对象的上报队列"""
+    if conn.chat_history_conf == 0:
+        return
+    name = _REPORT_TYPE_NAMES[type]
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
-        if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+        if conn.chat_history_conf == 2 and _audio_within_limit(conn, opus_data):
+            conn.enqueue_report(ChatReport(type, text, opus_data, int(time.time())))
             conn.logger.bind(tag=TAG).debug(
-                f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
+                f"{name}数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((1, text, None, int(time.time())))
+            conn.enqueue_report(ChatReport(type, text, None, int(time.time())))
             conn.logger.bind(tag=TAG).debug(
-                f"ASR数据已加入上报队列: {conn.device_id}, 不上报音频"
+                f"{name}数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
     except Exception as e:
-        conn.logger.bind(tag=TAG).debug(f"加入ASR上报队列失败: {text}, {e}")
+        conn.logger.bind(tag=TAG).error(f"加入{name}上报队列失败: {text}, {e}")
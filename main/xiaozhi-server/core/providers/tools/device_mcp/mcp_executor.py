@@ -1,5 +1,6 @@
 """设备端MCP工具执行器"""
 
+import json
 from typing import Dict, Any
 from ..base import ToolType, ToolDefinition, ToolExecutor
 from plugins_func.register import Action, ActionResponse
@@ -30,8 +31,6 @@ class DeviceMCPExecutor(ToolExecutor):
 
         try:
             # 转换参数为JSON字符串
-            import json
-
             args_str = json.dumps(arguments) if arguments else "{}"
 
             # 调用设备端MCP工具
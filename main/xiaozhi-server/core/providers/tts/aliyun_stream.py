@@ -8,6 +8,7 @@ import queue
 import asyncio
 import traceback
 from asyncio import Task
+import requests
 import websockets
 import os
 from datetime import datetime
@@ -71,8 +72,6 @@ class AccessToken:
             query_string,
         )
 
-        import requests
-
         response = requests.get(full_url)
         if response.ok:
             root_obj = response.json()
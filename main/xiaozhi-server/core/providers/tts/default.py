@@ -1,4 +1,5 @@
 import os
+import uuid
 from config.logger import setup_logging
 from core.providers.tts.base import TTSProviderBase
 
@@ -15,8 +16,6 @@ class DefaultTTS(TTSProviderBase):
 
     def generate_filename(self):
         """生成唯一的音频文件名"""
-        import uuid
-
         return os.path.join(self.output_dir, f"{uuid.uuid4()}.wav")
 
     async def text_to_speak(self, text, output_file):
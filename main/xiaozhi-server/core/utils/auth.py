@@ -2,35 +2,65 @@ import jwt
 import time
 import json
 import os
-from datetime import datetime, timedelta, timezone
+import hmac
+import hashlib
+from functools import lru_cache
 from typing import Tuple, Optional
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from core.utils.cache.manager import cache_manager, CacheType
 import base64
 
 
+def _b64url_encode(data: bytes) -> bytes:
+    """JWT使用的无填充base64url编码"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# HS256签名的JWT头部固定不变，预先编码
+_JWT_HEADER_B64 = _b64url_encode(
+    json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode()
+)
+
+
+@lru_cache(maxsize=8)
+def _pbkdf2_derive(secret_key: bytes, length: int) -> bytes:
+    """派生固定长度的密钥，PBKDF2计算耗时，同一密钥只派生一次"""
+    # 使用固定盐值（实际生产环境应使用随机盐）
+    salt = b"fixed_salt_placeholder"  # 生产环境应改为随机生成
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=length,
+        salt=salt,
+        iterations=100000,
+        backend=default_backend(),
+    )
+    return kdf.derive(secret_key)
+
+
 class AuthToken:
     def __init__(self, secret_key: str):
         self.secret_key = secret_key.encode()  # 转换为字节
         # 从密钥派生固定长度的加密密钥 (32字节 for AES-256)
         self.encryption_key = self._derive_key(32)
+        # 以密钥摘要作为缓存命名空间，不同密钥签发的token互不复用
+        self._cache_namespace = hashlib.sha256(self.secret_key).hexdigest()
 
     def _derive_key(self, length: int) -> bytes:
         """派生固定长度的密钥"""
-        from cryptography.hazmat.primitives import hashes
-        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-
-        # 使用固定盐值（实际生产环境应使用随机盐）
-        salt = b"fixed_salt_placeholder"  # 生产环境应改为随机生成
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=length,
-            salt=salt,
-            iterations=100000,
-            backend=default_backend(),
+        return _pbkdf2_derive(self.secret_key, length)
+
+    def _encode_jwt(self, payload: dict) -> str:
+        """使用HS256签发JWT，头部已预先编码，直接计算HMAC签名"""
+        payload_b64 = _b64url_encode(
+            json.dumps(payload, separators=(",", ":")).encode()
         )
-        return kdf.derive(self.secret_key)
+        signing_input = _JWT_HEADER_B64 + b"." + payload_b64
+        signature = hmac.new(self.secret_key, signing_input, hashlib.sha256).digest()
+        return (signing_input + b"." + _b64url_encode(signature)).decode()
 
     def _encrypt_payload(self, payload: dict) -> str:
         """使用AES-GCM加密整个payload"""
@@ -82,11 +112,18 @@ class AuthToken:
         :param device_id: 设备ID
         :return: JWT token字符串
         """
+        # token有效期1小时，缓存55分钟内直接复用，避免每次重新加密和签名
+        cached_token = cache_manager.get(
+            CacheType.AUTH_TOKEN, device_id, namespace=self._cache_namespace
+        )
+        if cached_token is not None:
+            return cached_token
+
         # 设置过期时间为1小时后
-        expire_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        expire_time = int(time.time()) + 3600
 
         # 创建原始payload
-        payload = {"device_id": device_id, "exp": expire_time.timestamp()}
+        payload = {"device_id": device_id, "exp": expire_time}
 
         # 加密整个payload
         encrypted_payload = self._encrypt_payload(payload)
@@ -95,7 +132,10 @@ class AuthToken:
         outer_payload = {"data": encrypted_payload}
 
         # 使用JWT进行编码
-        token = jwt.encode(outer_payload, self.secret_key, algorithm="HS256")
+        token = self._encode_jwt(outer_payload)
+        cache_manager.set(
+            CacheType.AUTH_TOKEN, device_id, token, namespace=self._cache_namespace
+        )
         return token
 
     def verify_token(self, token: str) -> Tuple[bool, Optional[str]]:
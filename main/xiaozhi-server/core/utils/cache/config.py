@@ -18,6 +18,7 @@ class CacheType(Enum):
     IP_INFO = "ip_info"
     CONFIG = "config"
     DEVICE_PROMPT = "device_prompt"
+    AUTH_TOKEN = "auth_token"
 
 
 @dataclass
@@ -54,5 +55,8 @@ class CacheConfig:
             CacheType.DEVICE_PROMPT: cls(
                 strategy=CacheStrategy.TTL, ttl=None, max_size=1000  # 手动失效
             ),
+            CacheType.AUTH_TOKEN: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=3300, max_size=10000  # 55分钟
+            ),
         }
         return configs.get(cache_type, cls())